@@ -1,3 +1,9 @@
+# Serve in production with uvicorn (daphne stays for `runserver` in development):
+#   uvicorn ashta_chamma.asgi:application --workers 4 --http httptools \
+#       --ws websockets --loop uvloop --ws-max-size 65536 \
+#       --ws-per-message-deflate true
+# permessage-deflate shrinks the repetitive board-state JSON in game_update frames.
+# The event loop is chosen by the server (--loop uvloop), before this module is imported.
 import os
 
 from django.core.asgi import get_asgi_application
@@ -66,6 +66,17 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache: the Redis server used by the channel layer (separate db); sessions live
+# in it too, so requests don't hit the django_session table
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_CACHE_ALIAS = 'default'
+
 # Database
 DATABASES = {
     'default': {
@@ -0,0 +1,77 @@
+# game/constants.py
+# Board and dice rules. Kept free of Django imports so the rules kernel (rules.py)
+# can be used without loading the ORM.
+
+# ---------------------------
+# Board definition (exact)
+# ---------------------------
+# This mapping matches the exact 7x7 table you provided.
+# Format: GRID[row][col] = index (0..48), 'S' suffix was used earlier to mark safe zones and 'H' for home.
+# We'll create index->(row,col) and safe zones using the provided table.
+
+GRID = [
+    [21, 20, 19, 18, 17, 16, 15],
+    [22, 24, 25, 26, 27, 28, 14],
+    [23, 39, 40, 41, 42, 29, 13],
+    [0,  38, 47, 48, 43, 30, 12],
+    [1,  37, 46, 45, 44, 31, 11],
+    [2,  36, 35, 34, 33, 32, 10],
+    [3,   4,  5,  6,  7,  8,  9],
+]
+
+# Safe zones as per your table (indexes with S)
+SAFE_ZONES = frozenset({18, 24, 28, 41, 0, 47, 43, 12, 45, 36, 32, 6})
+# Same set as a flat per-index table: SAFE_BY_INDEX[idx] -> bool
+SAFE_BY_INDEX = tuple(i in SAFE_ZONES for i in range(49))
+
+# Home index:
+HOME_INDEX = 48
+
+# Build index -> (r,c) and r,c -> index
+INDEX_TO_COORD = {}
+COORD_TO_INDEX = {}
+for r in range(7):
+    for c in range(7):
+        idx = GRID[r][c]
+        INDEX_TO_COORD[idx] = (r, c)
+        COORD_TO_INDEX[(r, c)] = idx
+
+# Ring of every index by max distance from center (3,3), computed once:
+# d == 3 => outer ring, d == 2 => inner ring (5x5 perimeter),
+# d == 1 => middle ring (3x3 perimeter), d == 0 => home
+RING_BY_INDEX = tuple(
+    max(abs(INDEX_TO_COORD[i][0] - 3), abs(INDEX_TO_COORD[i][1] - 3)) for i in range(49)
+)
+
+# Indexes in the inner (d==2) or middle (d==1) rings
+INNER_MIDDLE_SET = frozenset(i for i, d in enumerate(RING_BY_INDEX) if d in (1, 2))
+
+# Entry positions for players (choose four evenly spaced outer-entry indices)
+# These are chosen to be quarters: 0,12,24,36 from your table (they are well distributed)
+ENTRY_BY_COLOR = {
+    'red': 0,
+    'blue': 12,
+    'green': 24,
+    'yellow': 36,
+}
+
+# Dice values set (allowed values)
+DICE_VALUES = (1, 2, 3, 4, 5, 6, 12)
+DICE_SET = frozenset(DICE_VALUES)  # for membership checks
+ENTRY_VALUES = frozenset({1, 5, 6})  # can enter with these
+BONUS_VALUES = frozenset({1, 5, 6, 12})
+# Bitmask forms of the dice sets above: (MASK >> roll) & 1
+ENTRY_MASK = sum(1 << v for v in ENTRY_VALUES)
+BONUS_MASK = sum(1 << v for v in BONUS_VALUES)
+
+# Path step for every (origin, roll) an on-board piece can make, computed once:
+# MOVE_TABLE[(origin, roll)] = (dest, blood_gate, at_home), or None when the roll overshoots home.
+# blood_gate marks an outer -> inner crossing (needs a kill); HOME_INDEX is ring 0.
+MOVE_TABLE = {
+    (origin, roll): (
+        (origin + roll, RING_BY_INDEX[origin] == 3 and RING_BY_INDEX[origin + roll] <= 2, origin + roll == HOME_INDEX)
+        if origin + roll <= HOME_INDEX else None
+    )
+    for origin in range(HOME_INDEX)
+    for roll in range(1, max(DICE_VALUES) + 1)
+}
@@ -1,15 +1,21 @@
 # game/consumers.py
-import json
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+# Welcome frame, pre-serialized; only the room code varies. Room codes are slugs
+# (see routing.py), so they can be substituted without JSON escaping.
+_WELCOME_TPL = '{"type":"connected","room_code":"%s","message":"connected to game websocket"}'
+
 class GameConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for a single game room.
     Clients should connect to: ws://.../ws/game/<room_code>/
     The REST views broadcast messages to the group name "game_<room_code>" with:
-      { "type": "game_update", "data": {...} }
+      { "type": "game_update", "_wire": '{"type": "game_update", "data": {...}}' }
 
-    This consumer simply forwards that "data" payload to every connected client.
+    The frame is serialized once by the sender, so this consumer simply forwards
+    it to every connected client. Events carrying a plain "data" dict are still
+    serialized here.
     """
 
     async def connect(self):
@@ -21,11 +27,7 @@ class GameConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
         # Optionally: send a welcome or request initial state (frontend usually fetches via REST)
-        await self.send_json({
-            "type": "connected",
-            "room_code": self.room_code,
-            "message": "connected to game websocket",
-        })
+        await self.send(text_data=_WELCOME_TPL % self.room_code)
 
     async def disconnect(self, close_code):
         # Leave group
@@ -44,11 +46,19 @@ class GameConsumer(AsyncWebsocketConsumer):
         Handler for messages sent to the group by server-side code.
         The event's "data" property should be JSON-serializable.
         We'll forward it directly to the websocket client.
+        If the sender already serialized the frame ("_wire"), it is sent as-is.
         """
+        wire = event.get("_wire")
+        if wire is not None:
+            await self.send(text_data=wire)
+            return
+
         data = event.get("data", {})
         # Ensure always send type field
         payload = {
             "type": "game_update",
             "data": data,
         }
-        await self.send(text_data=json.dumps(payload))
+        # orjson is much faster than stdlib json on board-sized payloads; it returns
+        # bytes, which we decode so clients keep receiving text frames.
+        await self.send(text_data=orjson.dumps(payload).decode())
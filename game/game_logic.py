@@ -1,50 +1,65 @@
 # game/game_logic.py
+from .constants import DICE_VALUES
 
 class GameConfig:
     # 7x7 Board Configuration
-    SAFE_ZONES = [
+    SAFE_ZONES = frozenset({
         (3,0), (1,1), (5,1), (3,3), 
         (0,3), (2,3), (4,3), (6,3), 
         (3,4), (1,5), (5,5), (3,6)
-    ]
+    })
     HOME_INDEX = 53  # The final step index to reach home
+    # Inner Ring path steps (approx 26-41), built once for O(1) membership
+    INNER_RING = frozenset(range(26, 42))
+
+# Dice values that let a piece enter the board
+_ENTRY_DICE = frozenset({1, 5, 6})
+
+class PlayerView:
+    """
+    Minimal stand-in for a Player holding just the attributes the validators
+    read. Pass it to validate_move instead of a full model instance.
+    """
+    __slots__ = ('pieces', 'kills')
+
+    def __init__(self, pieces, kills):
+        self.pieces = pieces
+        self.kills = kills
+
+def _has_kill(kills):
+    # kills is a count on the Player model, a per-piece list on other callers
+    return bool(kills) if isinstance(kills, int) else any(kills)
 
 def check_blood_gate(player, piece_index):
     """Rule: Cannot enter Inner Ring without a kill."""
     # Assuming Inner Ring starts after the first loop (approx step 25)
     INNER_RING_GATE = 25
     
-    # Check total kills for the player
-    total_kills = sum(player.kills)
-    if total_kills == 0:
+    # Any single kill opens the gate
+    if not _has_kill(player.kills):
         return False
     return True
 
+def _count_in_inner_ring(pieces):
+    # Count pieces currently in inner ring (None is never in the set)
+    return sum(map(GameConfig.INNER_RING.__contains__, pieces))
+
 def check_lone_wolf(player, new_position):
     """Rule: If only 1 piece in Inner Ring, max move is 5."""
-    # Define Inner Ring range based on path steps (approx 26-41)
-    INNER_RING_START = 26
-    INNER_RING_END = 41
-    
-    # Count pieces currently in inner ring
-    pieces_in_inner = 0
-    for pos in player.pieces:
-        if pos is not None and INNER_RING_START <= pos <= INNER_RING_END:
-            pieces_in_inner += 1
-            
+    pieces_in_inner = _count_in_inner_ring(player.pieces)
+
     # If moving INTO or WITHIN inner ring and we have <= 1 piece there
-    if INNER_RING_START <= new_position <= INNER_RING_END:
+    if new_position in GameConfig.INNER_RING:
         # If we are the only one (or less), restriction applies
         if pieces_in_inner <= 1:
             return True
     return False
 
-def validate_move(game, player, piece_index, dice_value):
-    current_pos = player.pieces[piece_index]
-    
+def _evaluate_move(current_pos, dice_value, has_kill, pieces_in_inner):
+    """Move rules as a pure function of the few inputs they depend on."""
     # 1. Entry Rules
     if current_pos is None:
-        if dice_value in [1, 5, 6]:
+        if dice_value in _ENTRY_DICE:
             return True, "Enter"
         # Rule 12: Can only move existing pieces, not enter new ones
         return False, "Need 1, 5, or 6 to enter."
@@ -59,12 +74,30 @@ def validate_move(game, player, piece_index, dice_value):
     # 4. Blood Gate Check
     INNER_GATE_POS = 25
     if current_pos <= INNER_GATE_POS and new_pos > INNER_GATE_POS:
-        if not check_blood_gate(player, piece_index):
+        if not has_kill:
             return False, "Blood Gate! You need a kill to enter the inner ring."
 
     # 5. Lone Wolf Restriction
-    if check_lone_wolf(player, new_pos):
+    if new_pos in GameConfig.INNER_RING and pieces_in_inner <= 1:
         if dice_value > 5:
              return False, "Lone Wolf! You need backup to move fast in the inner ring."
 
     return True, "Valid"
+
+# Every (current_pos, dice_value, has_kill, pieces_in_inner) outcome, evaluated once at import.
+# Only "<= 1 vs more" matters for pieces_in_inner, so it is clamped to 2.
+VALID_MOVE = {
+    (pos, dice, has_kill, inner): _evaluate_move(pos, dice, has_kill, inner)
+    for pos in (None, *range(GameConfig.HOME_INDEX + 1))
+    for dice in DICE_VALUES
+    for has_kill in (False, True)
+    for inner in range(3)
+}
+
+def validate_move(game, player, piece_index, dice_value):
+    key = (player.pieces[piece_index], dice_value, _has_kill(player.kills), min(_count_in_inner_ring(player.pieces), 2))
+    result = VALID_MOVE.get(key)
+    if result is None:
+        # Outside the precomputed domain (e.g. an unexpected dice value)
+        result = _evaluate_move(*key)
+    return result
@@ -1,65 +1,22 @@
 # game/models.py
 from django.db import models
+from django.utils.functional import cached_property
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 import random
+import string
+
+from .constants import HOME_INDEX, ENTRY_BY_COLOR, DICE_VALUES
+from .rules import resolve_move, count_in_inner_or_middle, analyze_slots, entry_allowed
+
+# Per-piece slot columns on Player (see Player.pieces)
+PIECE_FIELDS = ('piece0', 'piece1', 'piece2', 'piece3', 'piece4', 'piece5')
+
+# Random room code: 6 chars from A-Z0-9 (get_random_string draws with secrets)
+ROOM_CODE_CHARS = string.ascii_uppercase + string.digits
 
-# ---------------------------
-# Board definition (exact)
-# ---------------------------
-# This mapping matches the exact 7x7 table you provided.
-# Format: GRID[row][col] = index (0..48), 'S' suffix was used earlier to mark safe zones and 'H' for home.
-# We'll create index->(row,col) and safe zones using the provided table.
-
-GRID = [
-    [21, 20, 19, 18, 17, 16, 15],
-    [22, 24, 25, 26, 27, 28, 14],
-    [23, 39, 40, 41, 42, 29, 13],
-    [0,  38, 47, 48, 43, 30, 12],
-    [1,  37, 46, 45, 44, 31, 11],
-    [2,  36, 35, 34, 33, 32, 10],
-    [3,   4,  5,  6,  7,  8,  9],
-]
-
-# Safe zones as per your table (indexes with S)
-SAFE_ZONES = {18, 24, 28, 41, 0, 47, 43, 12, 45, 36, 32, 6}
-
-# Home index:
-HOME_INDEX = 48
-
-# Build index -> (r,c) and r,c -> index
-INDEX_TO_COORD = {}
-COORD_TO_INDEX = {}
-for r in range(7):
-    for c in range(7):
-        idx = GRID[r][c]
-        INDEX_TO_COORD[idx] = (r, c)
-        COORD_TO_INDEX[(r, c)] = idx
-
-# Useful helper to detect rings by Manhattan max distance from center (3,3)
-def ring_for_index(idx):
-    r, c = INDEX_TO_COORD[idx]
-    d = max(abs(r - 3), abs(c - 3))
-    # d == 3 => outer ring, d == 2 => inner ring (5x5 perimeter),
-    # d == 1 => middle ring (3x3 perimeter), d == 0 => home
-    return d  # 3,2,1,0
-
-# Entry positions for players (choose four evenly spaced outer-entry indices)
-# These are chosen to be quarters: 0,12,24,36 from your table (they are well distributed)
-ENTRY_BY_COLOR = {
-    'red': 0,
-    'blue': 12,
-    'green': 24,
-    'yellow': 36,
-}
-
-# Dice values set (allowed values)
-DICE_VALUES = [1, 2, 3, 4, 5, 6, 12]
-ENTRY_VALUES = {1, 5, 6}  # can enter with these
-BONUS_VALUES = {1, 5, 6, 12}
-
-# Random room code
 def random_room_code():
-    return get_random_string(6).upper()
+    return get_random_string(6, ROOM_CODE_CHARS)
 
 # ---------------------------
 # Models
@@ -83,10 +40,30 @@ class Game(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # lobby listings filter on status and order by age
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    @classmethod
+    def with_players(cls):
+        # games with their players loaded in one extra query, in turn order; make_move,
+        # snapshot() and the serializers all read this cache instead of querying again
+        return cls.objects.prefetch_related(
+            models.Prefetch('players', queryset=Player.objects.order_by('position'))
+        )
+
+    @classmethod
+    def load_for_move(cls, room_code):
+        # whole game state needed to resolve moves (the game and all its players), in two queries
+        return cls.with_players().get(room_code=room_code)
+
     # convenience: return serialized minimal state for frontend (you can expand in serializer)
     def snapshot(self):
         players = []
-        for p in self.players.order_by('position'):
+        # sort in Python so a prefetched player list is reused instead of queried again
+        for p in sorted(self.players.all(), key=lambda p: p.position):
             players.append({
                 "player_name": p.player_name,
                 "color": p.color,
@@ -107,10 +84,23 @@ class Game(models.Model):
             "players": players,
         }
 
-    def try_start(self):
-        if self.status == 'waiting' and self.players.count() == self.num_players:
+    def seed_players(self, players_spec):
+        # create several players in one INSERT, e.g. [{"player_name": ..., "color": ..., "position": ...}, ...];
+        # bulk_create skips Player.save(), which is fine for new players (no pieces on board)
+        players = Player.objects.bulk_create([Player(game=self, **spec) for spec in players_spec])
+        # drop a stale prefetched player list before counting
+        getattr(self, '_prefetched_objects_cache', {}).pop('players', None)
+        self.try_start()
+        return players
+
+    def try_start(self, player_count=None):
+        # callers that already know the player count pass it; otherwise count() is
+        # answered from the prefetched player list when there is one
+        if player_count is None:
+            player_count = self.players.count()
+        if self.status == 'waiting' and player_count == self.num_players:
             self.status = 'in_progress'
-            self.save()
+            self.save(update_fields=["status", "updated_at"])
 
     def roll_for_player(self, player_position):
         # Basic guard:
@@ -121,10 +111,19 @@ class Game(models.Model):
 
         return random.choice(DICE_VALUES)
 
+    def roll_many(self, n):
+        # n dice values in one call, for simulations/bots (no turn checks)
+        return random.choices(DICE_VALUES, k=n)
+
     def advance_turn(self, bonus=False):
         if not bonus:
+            # advance in SQL (one column plus updated_at, no signals), then mirror it in memory
+            now = timezone.now()
+            Game.objects.filter(pk=self.pk).update(
+                current_player=(models.F('current_player') + 1) % self.num_players, updated_at=now
+            )
             self.current_player = (self.current_player + 1) % self.num_players
-            self.save()
+            self.updated_at = now
 
     def check_and_set_winner(self, player):
         # For solo mode: first to 6 finished
@@ -132,19 +131,23 @@ class Game(models.Model):
             if player.finished >= 6:
                 self.status = 'completed'
                 self.winner = player.position
-                self.save()
+                self.save(update_fields=["status", "winner", "updated_at"])
                 return True
             return False
         # For team mode: team wins when both members combined reach 12
         else:
             team = player.team
-            teammates = self.players.filter(team=team)
-            total = sum(t.finished for t in teammates)
+            cached = getattr(self, '_prefetched_objects_cache', {}).get('players')
+            if cached is not None:
+                # prefetched players (the mover included) already hold current counts
+                total = sum(t.finished for t in cached if t.team == team)
+            else:
+                total = self.players.filter(team=team).aggregate(total=models.Sum('finished'))['total'] or 0
             if total >= 12:
                 # set winner as the team (we'll store winner as the position of this player for simplicity)
                 self.status = 'completed'
                 self.winner = player.position
-                self.save()
+                self.save(update_fields=["status", "winner", "updated_at"])
                 return True
             return False
 
@@ -165,220 +168,140 @@ class Player(models.Model):
     color = models.CharField(max_length=10, choices=COLORS)
     position = models.IntegerField()  # turn order 0..num_players-1
 
-    # pieces -> list of 6 entries: None (off-board), 0..48 (path index), or 'HOME'
-    pieces = models.JSONField(default=list)  # should be length 6
+    # one column per piece slot: NULL (off-board), 0..47 (path index) or HOME_INDEX (home).
+    # Read them together through the `pieces` property.
+    piece0 = models.SmallIntegerField(null=True, blank=True)
+    piece1 = models.SmallIntegerField(null=True, blank=True)
+    piece2 = models.SmallIntegerField(null=True, blank=True)
+    piece3 = models.SmallIntegerField(null=True, blank=True)
+    piece4 = models.SmallIntegerField(null=True, blank=True)
+    piece5 = models.SmallIntegerField(null=True, blank=True)
     # number of kills performed by this player (for blood gate)
     kills = models.IntegerField(default=0)
     finished = models.IntegerField(default=0)
     team = models.IntegerField(null=True, blank=True)
 
     class Meta:
-        unique_together = ('game', 'position')
+        constraints = [
+            # one player per turn slot; its unique (game, position) index also serves player lookups
+            models.UniqueConstraint(fields=['game', 'position'], name='unique_player_position'),
+        ]
 
     def save(self, *args, **kwargs):
-        # ensure pieces array length 6
-        if not isinstance(self.pieces, list) or len(self.pieces) != 6:
-            # initialize as all off-board
-            self.pieces = [None] * 6
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "pieces" in update_fields:
+            # "pieces" is not a column; save the slot columns it is built from
+            kwargs["update_fields"] = {*update_fields, *PIECE_FIELDS} - {"pieces"}
         super().save(*args, **kwargs)
 
+    # pieces -> list of 6 entries: None (off-board), 0..47 (path index), or 'HOME'
+    # The list is built from the slot columns, so change pieces with set_piece() (or assign a whole list).
+    @property
+    def pieces(self):
+        return [
+            "HOME" if p == HOME_INDEX else p
+            for p in (self.piece0, self.piece1, self.piece2, self.piece3, self.piece4, self.piece5)
+        ]
+
+    @pieces.setter
+    def pieces(self, values):
+        for i, value in enumerate(values):
+            self.set_piece(i, value)
+
+    def set_piece(self, piece_index, value):
+        setattr(self, PIECE_FIELDS[piece_index], HOME_INDEX if value == "HOME" else value)
+
     def pieces_on_board(self):
         return [p for p in self.pieces if (p is not None and p != "HOME")]
 
+    def _slots(self):
+        # raw slot values as stored: None (off-board), 0..47 (path index) or HOME_INDEX
+        return [self.piece0, self.piece1, self.piece2, self.piece3, self.piece4, self.piece5]
+
     def count_in_inner_or_middle(self):
         # inner ring (d==2) and middle ring (d==1)
-        cnt = 0
-        for p in self.pieces:
-            if p is None or p == "HOME":
-                continue
-            d = ring_for_index(p)
-            if d in (1, 2):
-                cnt += 1
-        return cnt
+        return count_in_inner_or_middle(self._slots())
+
+    def _analyze_pieces(self):
+        # (first off-board slot or None, first on-board slot or None, pieces on board) in one pass
+        return analyze_slots(self._slots())
 
     def can_enter_with_roll(self, roll):
-        # must have at least one empty piece slot to enter
-        if all((x == "HOME" or x is not None) for x in self.pieces):
-            return False
-        if roll in ENTRY_VALUES:
-            return True
-        if roll == 12:
-            # 12 can be used only if player has at least one piece already on board
-            return any(x is not None and x != "HOME" for x in self.pieces)
-        return False
+        return entry_allowed(self._analyze_pieces(), roll)
 
     def first_offboard_index(self):
-        for i in range(6):
-            if self.pieces[i] is None:
-                return i
-        return None
+        return self._analyze_pieces()[0]
+
+    def _opponents(self, game=None):
+        # every other player in the game; served from the game's prefetched players when available
+        return [p for p in (game or self.game).players.all() if p.id != self.id]
+
+    @cached_property
+    def entry_idx(self):
+        # entry path index for this player's color (color never changes after joining)
+        return ENTRY_BY_COLOR[self.color]
 
     def entry_index(self):
         # returns the entry path index for this player's color
-        return ENTRY_BY_COLOR[self.color]
+        return self.entry_idx
 
     # attempt to enter a piece (when roll allows entry)
     def enter_piece(self, roll):
-        if not self.can_enter_with_roll(roll):
+        analysis = self._analyze_pieces()
+        if not entry_allowed(analysis, roll):
             raise ValueError("Cannot enter with this roll")
 
-        piece_idx = self.first_offboard_index()
+        piece_idx = analysis[0]
         if piece_idx is None:
             raise ValueError("No off-board pieces")
 
-        start_pos = self.entry_index()
+        start_pos = self.entry_idx
 
         # If the entry square is occupied by another friendly piece, that's fine (stacking allowed).
         # If occupied by enemy non-safe square -> capture occurs (handled outside).
-        self.pieces[piece_idx] = start_pos
-        self.save()
+        self.set_piece(piece_idx, start_pos)
+        self.save(update_fields=["pieces"])
         return piece_idx, start_pos
 
     # main move function: attempts to move a piece specified by piece_index by 'roll'
     # returns dict: {ok: bool, reason: str or None, from: idx, to: idx, captured: {player_pos, piece_index} or None, bonus: bool}
-    def make_move(self, piece_index, roll):
-        if self.game.status != 'in_progress':
+    # The rules live in rules.resolve_move; this loads the players' slots, runs it and saves the result.
+    # Pass the caller's (prefetched) game to skip the self.game lookup.
+    def make_move(self, piece_index, roll, game=None):
+        if game is None:
+            game = self.game
+        if game.status != 'in_progress':
             return {"ok": False, "reason": "game-not-active"}
 
-        # validate piece index
-        if not (0 <= piece_index < 6):
-            return {"ok": False, "reason": "invalid-piece-index"}
-
-        cur = self.pieces[piece_index]
-
-        # If piece off-board, only enter rules apply
-        if cur is None:
-            if not self.can_enter_with_roll(roll):
-                return {"ok": False, "reason": "cannot-enter-with-this-roll"}
-            # entering
-            entry_idx = self.entry_index()
-
-            # Check blood gate: entering inner ring isn't possible until player has at least 1 kill
-            # But entering typically puts you on outer ring (entry indices chosen are outer). So this generally is fine.
-            # Place piece
-            self.pieces[piece_index] = entry_idx
-            self.save()
-
-            # Resolve capture (if landing on non-safe enemy)
-            captured_info = self._resolve_capture_on_index(entry_idx)
-            bonus = (roll in BONUS_VALUES) or (captured_info is not None)
-            # record move outside by caller (views/consumers)
-            return {"ok": True, "from": None, "to": entry_idx, "captured": captured_info, "bonus": bonus}
-
-        # If piece already HOME
-        if cur == "HOME":
-            return {"ok": False, "reason": "piece-already-home"}
-
-        # Moving an on-board piece:
-        origin_idx = cur
-        origin_ring = ring_for_index(origin_idx)
-        # Lone wolf restriction:
-        # Count player's warriors inside inner ring (d <=2 and not HOME)
-        inner_middle_count = self.count_in_inner_or_middle()
-        # If exactly 1 inside inner ring OR middle ring (i.e., inner_middle_count == 1), that lone warrior limited to 5 steps per turn
-        effective_roll = roll
-        if inner_middle_count == 1:
-            # if this piece is the only one inside the inner/middle rings, limit its movement to 5
-            # But only applies if this piece is in inner/middle rings
-            if ring_for_index(origin_idx) in (1, 2):
-                if roll > 5:
-                    effective_roll = 5
-
-        # Compute destination index (linear path increase)
-        dest = origin_idx + effective_roll
-
-        # If destination beyond HOME_INDEX, it's invalid/wasted (must land exactly)
-        if dest > HOME_INDEX:
-            return {"ok": False, "reason": "overshoot-home"}
-
-        # If destination is HOME_INDEX, we move to HOME only if exact
+        players = [self, *self._opponents(game)]
+        pieces = [p._slots() for p in players]
+        kills = [p.kills for p in players]
+        finished = [p.finished for p in players]
+        ok, reason, origin_idx, dest, victim_idx, victim_piece, bonus = resolve_move(
+            pieces, kills, finished, 0, piece_index, roll, self.entry_idx
+        )
+        if not ok:
+            return {"ok": False, "reason": reason}
+
+        # Write back; one save per affected player
+        self.pieces = pieces[0]
+        self.kills = kills[0]
+        self.finished = finished[0]
+        self.save(update_fields=["pieces", "kills", "finished"])
         captured_info = None
+        if victim_idx is not None:
+            victim = players[victim_idx]
+            victim.set_piece(victim_piece, None)
+            victim.save(update_fields=["pieces"])
+            captured_info = {"player_position": victim.position, "piece_index": victim_piece}
 
-        # If moving from outer to inner (origin_ring==3 and dest_ring <=2) enforce Blood Gate
-        dest_ring = ring_for_index(dest) if dest != HOME_INDEX else 0
-        if origin_ring == 3 and dest_ring <= 2:
-            if self.kills == 0:
-                # Blood Gate blocks the move
-                return {"ok": False, "reason": "blood-gate-blocked"}
-
-        # If destination is a safe zone, capturing not allowed
-        # But if destination is occupied by enemy on non-safe zone -> capture
-        # Note: if multiple enemies present (allowed on safe zones) we consider stacking multiple pieces; capturing rules should only remove single piece if landed on non-safe single occupant.
-
-        # Check for exact home
         if dest == HOME_INDEX:
-            # Move piece to HOME
-            self.pieces[piece_index] = "HOME"
-            self.finished += 1
-            self.save()
-            # No capture at home
-            # bonus if roll in BONUS_VALUES (1,5,6,12) OR capturing (none)
-            bonus = (roll in BONUS_VALUES)
             # check for victory
-            self.game.check_and_set_winner(self)
-            return {"ok": True, "from": origin_idx, "to": "HOME", "captured": None, "bonus": bonus}
-
-        # Normal movement to dest (not home)
-        # Check if someone occupies dest; multiple pieces from same player can share a square (allowed),
-        # but if an opponent occupies dest on a non-safe square, capture occurs.
-        # We need to find any opponent pieces on dest (since pieces are stored per player).
-        if dest not in SAFE_ZONES:
-            # iterate opponents to find any occupying piece at 'dest'
-            for opponent in self.game.players.exclude(id=self.id):
-                for opp_idx, opp_pos in enumerate(opponent.pieces):
-                    if opp_pos == dest:
-                        # Underdog protection:
-                        # If opponent has >=2 warriors in inner/middle rings and this player has exactly 1 there,
-                        # then this player's lone warrior is immune to capture by that opponent.
-                        opp_inner = opponent.count_in_inner_or_middle()
-                        my_inner = self.count_in_inner_or_middle()
-                        # If opp_inner >=2 and my_inner == 1 and dest is our lone piece, protect (no capture)
-                        if opp_inner >= 2 and my_inner == 1:
-                            # no capture happens
-                            captured_info = None
-                        else:
-                            # capture opponent piece: set their piece back to None (off-board) and increment kills
-                            opponent.pieces[opp_idx] = None
-                            opponent.save()
-                            self.kills += 1
-                            self.save()
-                            captured_info = {"player_position": opponent.position, "piece_index": opp_idx}
-                        # only one piece is captured per landing
-                        break
-                if captured_info:
-                    break
-
-        # Move piece
-        self.pieces[piece_index] = dest
-        self.save()
-
-        # Bonus rules: roll in BONUS_VALUES or capture
-        bonus = (roll in BONUS_VALUES) or (captured_info is not None)
-
+            game.check_and_set_winner(self)
+            dest = "HOME"
+        # record move outside by caller (views/consumers)
         return {"ok": True, "from": origin_idx, "to": dest, "captured": captured_info, "bonus": bonus}
 
-    def _resolve_capture_on_index(self, idx):
-        """
-        Helper: when a piece lands on idx (e.g., on entry), check if enemies there to capture (if non-safe),
-        perform capture and return captured info or None.
-        """
-        if idx in SAFE_ZONES:
-            return None
-        for opponent in self.game.players.exclude(id=self.id):
-            for opp_idx, opp_pos in enumerate(opponent.pieces):
-                if opp_pos == idx:
-                    # check underdog protection
-                    opp_inner = opponent.count_in_inner_or_middle()
-                    my_inner = self.count_in_inner_or_middle()
-                    if opp_inner >= 2 and my_inner == 1:
-                        return None
-                    opponent.pieces[opp_idx] = None
-                    opponent.save()
-                    self.kills += 1
-                    self.save()
-                    return {"player_position": opponent.position, "piece_index": opp_idx}
-        return None
-
     def __str__(self):
         return f"{self.player_name} ({self.color})"
 
@@ -399,5 +322,11 @@ class GameMove(models.Model):
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # move logs are read per game, newest first
+            models.Index(fields=['game', '-timestamp']),
+        ]
+
     def __str__(self):
         return f"Move {self.id} game={self.game.room_code} by={self.player.player_name}"
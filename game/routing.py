@@ -1,8 +1,8 @@
 # game/routing.py
-from django.urls import re_path
+from django.urls import path
 from .consumers import GameConsumer
 
 websocket_urlpatterns = [
-    re_path(r'ws/game/(?P<room_code>\w+)/$', GameConsumer.as_asgi()),
+    path('ws/game/<slug:room_code>/', GameConsumer.as_asgi()),
 ]
 
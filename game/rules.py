@@ -0,0 +1,120 @@
+# game/rules.py
+# Move rules on plain per-player slot lists, with no ORM access.
+# A player's slots are 6 raw values: None (off-board), 0..47 (path index) or HOME_INDEX (home).
+# Player.make_move is a thin wrapper that loads these lists from the models and writes back.
+
+from .constants import HOME_INDEX, RING_BY_INDEX, INNER_MIDDLE_SET, SAFE_BY_INDEX, ENTRY_MASK, BONUS_MASK, MOVE_TABLE
+
+
+def count_in_inner_or_middle(slots):
+    # inner ring (d==2) and middle ring (d==1); None and HOME_INDEX (ring 0) are never in the set
+    return sum(map(INNER_MIDDLE_SET.__contains__, slots))
+
+
+def analyze_slots(slots):
+    # one pass over the slots: (first off-board slot or None, first on-board slot or None, pieces on board)
+    first_off = first_on = None
+    on_board = 0
+    for i, x in enumerate(slots):
+        if x is None:
+            if first_off is None:
+                first_off = i
+        elif x != HOME_INDEX:
+            on_board += 1
+            if first_on is None:
+                first_on = i
+    return first_off, first_on, on_board
+
+
+def entry_allowed(analysis, roll):
+    # entry check on an analyze_slots() result
+    first_off, _, on_board = analysis
+    # must have at least one empty piece slot to enter
+    if first_off is None:
+        return False
+    if (ENTRY_MASK >> roll) & 1:
+        return True
+    # 12 can be used only if player has at least one piece already on board
+    return roll == 12 and on_board > 0
+
+
+def resolve_move(pieces, kills, finished, actor, piece_index, roll, entry_idx):
+    """
+    Resolve one move of pieces[actor][piece_index] by 'roll', updating the lists in place.
+    pieces is a list of slot lists (one per player), kills/finished are per-player counters,
+    entry_idx is the actor's entry path index.
+    Returns (ok, reason, from_idx, to_idx, captured_player, captured_piece, bonus), where
+    captured_player is an index into pieces. Nothing is changed when ok is False.
+    """
+    # validate piece index (None: no slot could be picked, e.g. nothing can enter)
+    if piece_index is None or not (0 <= piece_index < 6):
+        return False, "invalid-piece-index", None, None, None, None, False
+
+    mine = pieces[actor]
+    cur = mine[piece_index]
+    captured_player = captured_piece = None
+
+    # If piece off-board, only enter rules apply
+    if cur is None:
+        if not entry_allowed(analyze_slots(mine), roll):
+            return False, "cannot-enter-with-this-roll", None, None, None, None, False
+        mine[piece_index] = entry_idx
+        # Capture the first enemy piece on a non-safe entry square, unless underdog protection applies
+        if not SAFE_BY_INDEX[entry_idx]:
+            for p, slots in enumerate(pieces):
+                if p == actor or entry_idx not in slots:
+                    continue
+                if not (count_in_inner_or_middle(slots) >= 2 and count_in_inner_or_middle(mine) == 1):
+                    captured_player, captured_piece = p, slots.index(entry_idx)
+                break
+        if captured_player is not None:
+            pieces[captured_player][captured_piece] = None
+            kills[actor] += 1
+        bonus = bool((BONUS_MASK >> roll) & 1) or captured_player is not None
+        return True, None, None, entry_idx, captured_player, captured_piece, bonus
+
+    # If piece already HOME
+    if cur == HOME_INDEX:
+        return False, "piece-already-home", None, None, None, None, False
+
+    # Moving an on-board piece:
+    origin_idx = cur
+    origin_ring = RING_BY_INDEX[origin_idx]
+    # Lone wolf restriction: a lone warrior in the inner/middle rings moves at most 5 steps
+    my_inner = count_in_inner_or_middle(mine)
+    effective_roll = roll
+    if my_inner == 1 and origin_ring in (1, 2) and roll > 5:
+        effective_roll = 5
+
+    # Destination from the precomputed path table; must land on HOME exactly
+    step = MOVE_TABLE[origin_idx, effective_roll]
+    if step is None:
+        return False, "overshoot-home", None, None, None, None, False
+    dest, blood_gate, at_home = step
+
+    # Blood Gate: moving from outer to inner (HOME is ring 0) needs at least one kill
+    if blood_gate and kills[actor] == 0:
+        return False, "blood-gate-blocked", None, None, None, None, False
+
+    # bonus if roll in BONUS_VALUES (1,5,6,12) OR capturing
+    if at_home:
+        mine[piece_index] = HOME_INDEX
+        finished[actor] += 1
+        return True, None, origin_idx, HOME_INDEX, None, None, bool((BONUS_MASK >> roll) & 1)
+
+    # Capture the first enemy piece on a non-safe dest. Underdog protection:
+    # an opponent with >=2 warriors in inner/middle rings cannot lose a piece to our lone warrior there.
+    if not SAFE_BY_INDEX[dest]:
+        for p, slots in enumerate(pieces):
+            if p == actor or dest not in slots:
+                continue
+            if count_in_inner_or_middle(slots) >= 2 and my_inner == 1:
+                continue
+            captured_player, captured_piece = p, slots.index(dest)
+            pieces[p][captured_piece] = None
+            kills[actor] += 1
+            break
+
+    mine[piece_index] = dest
+    bonus = bool((BONUS_MASK >> roll) & 1) or captured_player is not None
+    return True, None, origin_idx, dest, captured_player, captured_piece, bonus
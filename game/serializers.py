@@ -1,6 +1,14 @@
 # game/serializers.py
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Game, Player, GameMove, SAFE_ZONES, HOME_INDEX, ENTRY_BY_COLOR
+from .models import Game, Player, GameMove
+from .constants import SAFE_ZONES, HOME_INDEX, ENTRY_BY_COLOR, DICE_VALUES, DICE_SET
+
+# Attempts at drawing a free room code before giving up
+ROOM_CODE_ATTEMPTS = 5
+
+# Safe zones never change, so sort them once instead of on every representation
+_SORTED_SAFE_ZONES = tuple(sorted(SAFE_ZONES))
 
 
 class PlayerSerializer(serializers.ModelSerializer):
@@ -37,16 +45,21 @@ class PlayerCreateSerializer(serializers.ModelSerializer):
         if game is None:
             raise serializers.ValidationError("Game context is required to create a player.")
 
+        # Checked against the game's player list, which views load once (prefetched)
+        players = game.players.all()
+        if len(players) >= game.num_players:
+            raise serializers.ValidationError("This game is already full.")
+
         color = attrs.get("color")
         # Make sure the color isn't already taken in this game
-        if game.players.filter(color=color).exists():
+        if any(p.color == color for p in players):
             raise serializers.ValidationError({"color": "This color is already taken in this game."})
 
         # Validate position uniqueness
         position = attrs.get("position")
         if position is None:
             raise serializers.ValidationError({"position": "Position (turn order) is required."})
-        if game.players.filter(position=position).exists():
+        if any(p.position == position for p in players):
             raise serializers.ValidationError({"position": "This position is already taken in the game."})
 
         # If team mode, ensure team assignment is either 1 or 2
@@ -59,20 +72,22 @@ class PlayerCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Initialize pieces list to six None entries and default kills/finished to 0.
+        Default kills/finished to 0. Pieces need no setup: every slot column
+        defaults to NULL (off-board).
         """
         game = self.context.get("game")
         if game is None:
             raise serializers.ValidationError("Game context required.")
 
-        # Initialize pieces to exactly six None entries
-        validated_data.setdefault("pieces", [None] * 6)
         validated_data.setdefault("kills", 0)
         validated_data.setdefault("finished", 0)
 
-        player = Player.objects.create(game=game, **validated_data)
+        player_count = len(game.players.all()) + 1
+        player = Player(game=game, **validated_data)
+        # add() saves the player and drops any stale prefetched player list on the game
+        game.players.add(player, bulk=False)
         # After creating player, attempt to auto-start the game if full
-        game.try_start()
+        game.try_start(player_count)
         return player
 
 
@@ -138,23 +153,21 @@ class GameSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Extend representation with 'snapshot' style data for frontend convenience.
-        This duplicates some data but makes frontend integration simpler.
+        This duplicates some data, so it is only added when the context sets
+        "include_snapshot" (see GameViewSet.retrieve).
         """
         rep = super().to_representation(instance)
-        # Add a compact players list matching the snapshot format in models.py
-        rep["snapshot_players"] = [
-            {
-                "player_name": p.player_name,
-                "color": p.color,
-                "position": p.position,
-                "pieces": p.pieces,
-                "kills": p.kills,
-                "finished": p.finished,
-                "team": p.team,
-            } for p in instance.players.order_by("position")
-        ]
+        # Players always in turn order (clients index players[current_player]), whether or
+        # not the instance still holds the position-ordered prefetch (a join drops it)
+        rep["players"].sort(key=lambda p: p["position"])
+        if self.context.get("include_snapshot"):
+            # Add a compact players list matching the snapshot format in models.py,
+            # built from the already serialized players instead of reading them again
+            rep["snapshot_players"] = [
+                {k: v for k, v in p.items() if k != "id"} for p in rep["players"]
+            ]
         # add safe_zones and home_index
-        rep["safe_zones"] = sorted(list(SAFE_ZONES))
+        rep["safe_zones"] = _SORTED_SAFE_ZONES
         rep["home_index"] = HOME_INDEX
         return rep
 
@@ -170,9 +183,15 @@ class GameCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "room_code"]
 
     def create(self, validated_data):
-        # create and return game
-        game = Game.objects.create(**validated_data)
-        return game
+        # create and return game; each attempt draws a new room code (model default),
+        # so a code collision is retried here instead of failing the request
+        for attempt in range(ROOM_CODE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return Game.objects.create(**validated_data)
+            except IntegrityError:
+                if attempt == ROOM_CODE_ATTEMPTS - 1:
+                    raise
 
 
 # Small helper serializers / actions for game operations (optional convenience)
@@ -186,6 +205,27 @@ class RollResultSerializer(serializers.Serializer):
     message = serializers.CharField(allow_blank=True)
 
 
+class MoveInputSerializer(serializers.Serializer):
+    """
+    Validates the body of a move request: the player (by id or turn position),
+    the dice value and an optional piece slot (omitted when entering a piece).
+    """
+    player_id = serializers.IntegerField(required=False)
+    position = serializers.IntegerField(required=False)
+    dice_value = serializers.IntegerField()
+    piece_index = serializers.IntegerField(min_value=0, max_value=5, required=False, allow_null=True)
+
+    def validate_dice_value(self, value):
+        if value not in DICE_SET:
+            raise serializers.ValidationError(f"invalid dice_value, allowed {list(DICE_VALUES)}")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get("player_id") and attrs.get("position") is None:
+            raise serializers.ValidationError("player_id or position required")
+        return attrs
+
+
 class MakeMoveResultSerializer(serializers.Serializer):
     ok = serializers.BooleanField()
     reason = serializers.CharField(allow_null=True, allow_blank=True)
@@ -193,4 +233,5 @@ class MakeMoveResultSerializer(serializers.Serializer):
     to_position = serializers.CharField(allow_null=True)
     captured = serializers.DictField(child=serializers.IntegerField(), allow_null=True, required=False)
     bonus = serializers.BooleanField()
-    game = GameSerializer(read_only=True)
+    # already serialized GameSerializer data (see views.serialize_game)
+    game = serializers.DictField(read_only=True)
@@ -0,0 +1,90 @@
+# game/state.py
+# In-memory game state for bots, simulations and tests: moves are resolved with the same
+# rules kernel as Player.make_move, without touching the database.
+# Production gameplay goes through the models; use from_model()/write_back() at the boundaries.
+import copy
+from dataclasses import dataclass
+
+from .constants import HOME_INDEX, ENTRY_BY_COLOR
+from .rules import resolve_move
+
+
+@dataclass
+class GameState:
+    # per player, indexed by turn position: slot lists (None, 0..47 or HOME_INDEX) and counters
+    pieces: list
+    kills: list
+    finished: list
+    entries: tuple  # entry path index of each player's color
+    teams: tuple  # team of each player (None outside team mode)
+    current: int = 0
+    status: str = 'in_progress'
+    winner: int = None
+    team_mode: bool = False
+
+    @classmethod
+    def from_model(cls, game):
+        # players are read through game.players.all(), so a prefetched game (Game.with_players) costs no query
+        players = sorted(game.players.all(), key=lambda p: p.position)
+        return cls(
+            pieces=[p._slots() for p in players],
+            kills=[p.kills for p in players],
+            finished=[p.finished for p in players],
+            entries=tuple(ENTRY_BY_COLOR[p.color] for p in players),
+            teams=tuple(p.team for p in players),
+            current=game.current_player,
+            status=game.status,
+            winner=game.winner,
+            team_mode=game.team_mode,
+        )
+
+    def write_back(self, game):
+        # persist this state onto the game and its players (one save per row)
+        for p in game.players.all():
+            p.pieces = self.pieces[p.position]
+            p.kills = self.kills[p.position]
+            p.finished = self.finished[p.position]
+            p.save(update_fields=["pieces", "kills", "finished"])
+        game.current_player = self.current
+        game.status = self.status
+        game.winner = self.winner
+        game.save(update_fields=["current_player", "status", "winner", "updated_at"])
+
+    def has_won(self, player_idx):
+        # same thresholds as Game.check_and_set_winner
+        if not self.team_mode:
+            return self.finished[player_idx] >= 6
+        team = self.teams[player_idx]
+        return sum(f for f, t in zip(self.finished, self.teams) if t == team) >= 12
+
+
+def apply_move(state, player_idx, piece_idx, roll):
+    """
+    Apply one move to a copy of 'state' and return (new_state, result).
+    result matches Player.make_move's dict ('to' is "HOME" at home). On success the
+    winner is checked and the turn advances unless a bonus was earned, like the move view.
+    A failed move returns the original state unchanged.
+    """
+    if state.status != 'in_progress':
+        return state, {"ok": False, "reason": "game-not-active"}
+    if player_idx != state.current:
+        return state, {"ok": False, "reason": "not-player-turn"}
+
+    new = copy.deepcopy(state)
+    ok, reason, origin_idx, dest, victim_idx, victim_piece, bonus = resolve_move(
+        new.pieces, new.kills, new.finished, player_idx, piece_idx, roll, new.entries[player_idx]
+    )
+    if not ok:
+        return state, {"ok": False, "reason": reason}
+
+    captured_info = None
+    if victim_idx is not None:
+        captured_info = {"player_position": victim_idx, "piece_index": victim_piece}
+    if dest == HOME_INDEX:
+        dest = "HOME"
+        if new.has_won(player_idx):
+            new.status = 'completed'
+            new.winner = player_idx
+    if not bonus:
+        new.current = (new.current + 1) % len(new.pieces)
+    return new, {"ok": True, "from": origin_idx, "to": dest, "captured": captured_info, "bonus": bonus}
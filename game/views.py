@@ -1,13 +1,17 @@
 # game/views.py
+import logging
+
+import orjson
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.http import Http404
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.db import transaction
 
-from .models import Game, Player, GameMove, DICE_VALUES
+from .models import Game, GameMove
 from .serializers import (
     GameSerializer,
     GameCreateSerializer,
@@ -15,6 +19,7 @@ from .serializers import (
     PlayerCreateSerializer,
     GameMoveSerializer,
     RollResultSerializer,
+    MoveInputSerializer,
     MakeMoveResultSerializer,
 )
 
@@ -23,31 +28,114 @@ def broadcast_game_state(room_code, payload=None):
     """
     Helper: broadcast the game's snapshot to all websocket clients in the group.
     If payload is provided, it will be used, otherwise the view will fetch the latest snapshot.
+    Inside a transaction the send waits until commit (still on the request thread), so the
+    game row lock is released first and clients never see state that gets rolled back.
+    A failed send is logged, not raised: the action has already been committed.
     """
     channel_layer = get_channel_layer()
     group = f"game_{room_code}"
-    async_to_sync(channel_layer.group_send)(
+    # Serialize the frame once here instead of once per connected consumer.
+    wire = orjson.dumps({"type": "game_update", "data": payload or {}}).decode()
+    transaction.on_commit(lambda: async_to_sync(channel_layer.group_send)(
         group,
         {
             "type": "game_update",
-            "data": payload or {},  # consumer will forward
+            "_wire": wire,  # consumer will forward as-is
         },
-    )
+    ), robust=True)
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a serialized game stays cached
+GAME_CACHE_TTL = 60
+
+
+def game_cache_key(room_code):
+    return f"game:{room_code}"
+
+
+def read_cached_game(key):
+    # cached representation, or None on a miss or when the cache is unreachable (callers use the ORM)
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("game cache read failed for %s", key, exc_info=True)
+        return None
+
+
+def _store_cached_game(store, key, data):
+    # runs after commit; if the entry can't be refreshed, drop it so older state isn't served as current
+    try:
+        store(key, data, GAME_CACHE_TTL)
+    except Exception:
+        logger.warning("game cache write failed for %s", key, exc_info=True)
+        cache.delete(key)
+
+
+def serialize_game(game, fresh=False):
+    """
+    Helper: GameSerializer(game).data, cached per room so the response body and the
+    websocket broadcast share one serialization, and retrieve can skip the database.
+    Write paths pass fresh=True to re-serialize and overwrite the entry; other callers
+    reuse it, and on a miss only fill it if no writer got there first. The cache is
+    updated once the surrounding transaction commits. Cache errors never fail the request:
+    a failed read falls back to the serializer, and a failed write is logged and followed
+    by a delete of the entry, since the write it follows is already committed.
+    """
+    key = game_cache_key(game.room_code)
+    data = None if fresh else read_cached_game(key)
+    if data is None:
+        data = GameSerializer(game).data
+        store = cache.set if fresh else cache.add
+        transaction.on_commit(lambda: _store_cached_game(store, key, data), robust=True)
+    return data
+
+
+def find_player(game, player_id=None, position=None):
+    """
+    Helper: pick a player of the game by id (preferred) or turn position.
+    Uses the game's prefetched players, so no extra query is made and the returned
+    instance is the same one make_move and snapshot() see. Raises Http404 if missing.
+    """
+    try:
+        if player_id:
+            player_id = int(player_id)
+        else:
+            position = int(position)
+    except (TypeError, ValueError):
+        raise Http404("No such player in this game.")
+    for p in game.players.all():
+        if (p.pk == player_id) if player_id else (p.position == position):
+            return p
+    raise Http404("No such player in this game.")
 
 
 class GameViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Game. Endpoints:
       - POST /games/            -> create game (GameCreateSerializer)
-      - GET  /games/{pk}/       -> game detail (snapshot included)
+      - GET  /games/{pk}/       -> game detail (?snapshot=1 adds snapshot_players)
       - POST /games/{pk}/join/  -> join game (payload: player_name, color, position, optional team)
       - POST /games/{pk}/roll/  -> roll dice (payload: player_id OR position)
       - POST /games/{pk}/move/  -> make move (payload: player_id, piece_index, dice_value)
     """
-    queryset = Game.objects.all()
+    # players are read by every action (turn checks, moves, serializers); load them in one query
+    queryset = Game.with_players()
     serializer_class = GameSerializer
     lookup_field = "room_code"  # so endpoints use room_code instead of numeric id
 
+    # actions that read then write game state; each runs in transaction.atomic
+    LOCKING_ACTIONS = ("join", "roll", "move")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.LOCKING_ACTIONS:
+            # lock the game row until the action's transaction ends, so concurrent
+            # joins (capacity) and turns (current_player) are applied one at a time
+            queryset = queryset.select_for_update()
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "create":
             return GameCreateSerializer
@@ -62,15 +150,32 @@ class GameViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         game = serializer.save()
         # Return the full serialized game
-        out = GameSerializer(game).data
+        out = serialize_game(game, fresh=True)
         return Response(out, status=status.HTTP_201_CREATED)
 
     def retrieve(self, request, *args, **kwargs):
         """
-        Return game snapshot (GameSerializer + extra snapshot fields)
+        Return game state (GameSerializer). Pass ?snapshot=1 to also get the
+        snapshot-style "snapshot_players" list.
         """
-        game = self.get_object()
-        return Response(GameSerializer(game).data)
+        if request.query_params.get("snapshot") in ("1", "true"):
+            game = self.get_object()
+            return Response(GameSerializer(game, context={"include_snapshot": True}).data)
+        # polled by clients: serve the cached representation without touching the database
+        data = read_cached_game(game_cache_key(kwargs[self.lookup_field]))
+        if data is None:
+            data = serialize_game(self.get_object())
+        return Response(data)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        key = game_cache_key(serializer.instance.room_code)
+        transaction.on_commit(lambda: cache.delete(key), robust=True)
+
+    def perform_destroy(self, instance):
+        room_code = instance.room_code
+        super().perform_destroy(instance)
+        transaction.on_commit(lambda: cache.delete(game_cache_key(room_code)), robust=True)
 
     @action(detail=True, methods=["post"], url_path="join")
     @transaction.atomic
@@ -85,12 +190,12 @@ class GameViewSet(viewsets.ModelViewSet):
         # Validate via PlayerCreateSerializer with game context
         serializer = PlayerCreateSerializer(data=data, context={"game": game})
         serializer.is_valid(raise_exception=True)
+        # create() also starts the game once it is full
         player = serializer.create(serializer.validated_data)
-        # Attempt auto-start
-        game.try_start()
-        # Broadcast updated game snapshot
-        broadcast_game_state(game.room_code, {"game": game.snapshot()})
-        return Response(GameSerializer(game).data, status=status.HTTP_201_CREATED)
+        # Serialize once for both the broadcast and the response
+        payload = serialize_game(game, fresh=True)
+        broadcast_game_state(game.room_code, {"game": payload})
+        return Response(payload, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], url_path="roll")
     @transaction.atomic
@@ -106,10 +211,8 @@ class GameViewSet(viewsets.ModelViewSet):
         player = None
         player_id = request.data.get("player_id")
         position = request.data.get("position")
-        if player_id:
-            player = get_object_or_404(Player, pk=player_id, game=game)
-        elif position is not None:
-            player = get_object_or_404(Player, game=game, position=position)
+        if player_id or position is not None:
+            player = find_player(game, player_id, position)
         else:
             return Response({"detail": "player_id or position required"}, status=400)
 
@@ -123,7 +226,7 @@ class GameViewSet(viewsets.ModelViewSet):
         # Return standard roll response (bonus decision will be made after attempting a move/enter)
         roll_payload = {"dice_value": dice_value, "bonus": False, "message": ""}
         # Broadcast roll result to clients (so they can animate dice)
-        broadcast_game_state(game.room_code, {"roll": roll_payload, "game": game.snapshot()})
+        broadcast_game_state(game.room_code, {"roll": roll_payload, "game": serialize_game(game)})
 
         return Response(RollResultSerializer(roll_payload).data)
 
@@ -138,54 +241,28 @@ class GameViewSet(viewsets.ModelViewSet):
             "dice_value": <int>
         }
 
-        Returns MakeMoveResultSerializer
+        Returns MakeMoveResultSerializer, or { ok: false, reason } with status 400
+        for a move the rules reject.
         """
         game = self.get_object()
-        player = None
-        player_id = request.data.get("player_id")
-        position = request.data.get("position")
-        if player_id:
-            player = get_object_or_404(Player, pk=player_id, game=game)
-        elif position is not None:
-            player = get_object_or_404(Player, game=game, position=position)
-        else:
-            return Response({"detail": "player_id or position required"}, status=400)
-
-        dice_value = request.data.get("dice_value")
-        if dice_value is None:
-            return Response({"detail": "dice_value is required"}, status=400)
-        try:
-            dice_value = int(dice_value)
-        except ValueError:
-            return Response({"detail": "dice_value must be integer"}, status=400)
-        if dice_value not in DICE_VALUES:
-            return Response({"detail": f"invalid dice_value, allowed {DICE_VALUES}"}, status=400)
-
-        piece_index = request.data.get("piece_index")
-        if piece_index is not None:
-            try:
-                piece_index = int(piece_index)
-            except ValueError:
-                return Response({"detail": "piece_index must be integer 0..5"}, status=400)
+        serializer = MoveInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        player = find_player(game, data.get("player_id"), data.get("position"))
+        dice_value = data["dice_value"]
+        piece_index = data.get("piece_index")
 
         # Ensure it's player's turn
         if game.current_player != player.position:
             return Response({"detail": "not-player-turn"}, status=400)
 
-        # Use Player.make_move (synchronous, returns result dict)
-        result = player.make_move(piece_index if piece_index is not None else (player.first_offboard_index() if player.can_enter_with_roll(dice_value) else None), dice_value)
+        # Use Player.make_move (synchronous, returns result dict); without a piece_index the
+        # first off-board piece tries to enter, and the entry rules report why it can't
+        result = player.make_move(piece_index if piece_index is not None else player.first_offboard_index(), dice_value, game=game)
 
-        # If not ok, return reason
+        # If not ok, return only the reason; nothing changed, clients keep their last state
         if not result.get("ok"):
-            return Response(MakeMoveResultSerializer({
-                "ok": False,
-                "reason": result.get("reason"),
-                "from_position": result.get("from"),
-                "to_position": result.get("to"),
-                "captured": result.get("captured"),
-                "bonus": False,
-                "game": GameSerializer(game).data,
-            }).data, status=400)
+            return Response({"ok": False, "reason": result.get("reason")}, status=400)
 
         # Log the move to GameMove
         gm = GameMove.objects.create(
@@ -203,8 +280,9 @@ class GameViewSet(viewsets.ModelViewSet):
         # Advance turn if no bonus; if bonus is True, current_player remains same
         game.advance_turn(bonus=bool(result.get("bonus")))
 
-        # Broadcast updated game snapshot and the move
-        broadcast_game_state(game.room_code, {"move": GameMoveSerializer(gm).data, "game": game.snapshot()})
+        # Serialize once for both the broadcast and the response
+        payload = serialize_game(game, fresh=True)
+        broadcast_game_state(game.room_code, {"move": GameMoveSerializer(gm).data, "game": payload})
 
         # Prepare response
         response_payload = {
@@ -214,6 +292,6 @@ class GameViewSet(viewsets.ModelViewSet):
             "to_position": result.get("to"),
             "captured": result.get("captured"),
             "bonus": bool(result.get("bonus")),
-            "game": GameSerializer(game).data,
+            "game": payload,
         }
         return Response(MakeMoveResultSerializer(response_payload).data)